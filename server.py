@@ -1,10 +1,16 @@
 import os
-import json
-import base64
+import atexit
+import threading
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 from typing import Literal, Optional
 
+import orjson
+from cachetools import LRUCache, TTLCache, cached
 from dotenv import load_dotenv
-from github import Github, GithubException
+from github import Auth, Github, GithubException, UnknownObjectException
+from github.ContentFile import ContentFile
+from github.Repository import Repository
 from mcp.server.fastmcp import FastMCP
 import logging
 
@@ -16,7 +22,55 @@ logger = logging.getLogger(__name__)
 # Helpers
 # -----------------------------
 def _err_msg(e: GithubException) -> str:
-    return e.data.get("message") if getattr(e, "data", None) else str(e)
+    data = getattr(e, "data", None)
+    return (data.get("message") if isinstance(data, dict) else None) or str(e)
+
+
+def _persist_connection(gh: Github) -> None:
+    # PyGithub >= 2.6 calls its connection factory without a hostname, which makes it
+    # close and rebuild the HTTPS connection (new TCP + TLS handshake) on every request.
+    # Keep one connection per thread instead; a connection is not safe to share between
+    # threads since it holds the in-flight request state.
+    requester = gh.requester
+    create_connection = requester._Requester__createConnection
+    close = requester.close
+    local = threading.local()
+    lock = threading.Lock()
+    connections = []
+
+    def connection(hostname=None):
+        cnx = getattr(local, "cnx", None)
+        if cnx is None:
+            with lock:
+                cnx = local.cnx = create_connection()
+                # detach it so the next create_connection() call does not close it
+                requester._Requester__connection = None
+                connections.append(cnx)
+        return cnx
+
+    def close_all() -> None:
+        # the requester no longer tracks these connections, so gh.close() must
+        with lock:
+            for cnx in connections:
+                cnx.close()
+            connections.clear()
+        close()
+
+    requester._Requester__createConnection = connection
+    requester.close = close_all
+
+
+# Control bytes other than \t \n \v \f \r mark a file as binary; bytes >= 0x80 are
+# left alone so UTF-8 text is not mistaken for binary
+_PRINTABLE_BYTES = bytes(range(9, 14)) + bytes(range(32, 256))
+
+# File previews stop at 4000 characters; a UTF-8 character is at most 4 bytes, so
+# decoding that many bytes from the start of a file always covers the preview
+_PREVIEW_CHARS = 4000
+_PREVIEW_BYTES = _PREVIEW_CHARS * 4
+
+# GitHub's search API returns at most this many results for any query
+_SEARCH_RESULT_LIMIT = 1000
 
 
 # -----------------------------
@@ -28,10 +82,121 @@ if not GITHUB_TOKEN:
     # Avoid noisy output on stdio (matches your TS version’s behavior)
     raise SystemExit(1)
 
-# GitHub client (PyGithub)
-gh = Github(GITHUB_TOKEN)
+# GitHub client (PyGithub). Tools page through results in 100-item API pages (see
+# _page_window) and must not change gh.per_page, which is shared by every request.
+gh = Github(auth=Auth.Token(GITHUB_TOKEN), per_page=100)
+_persist_connection(gh)
+
+# Shared worker pool for independent GitHub calls made by the tools. Its threads, and
+# the per-thread connections they open, are reused across invocations; max_workers
+# caps how many requests the tools can have in flight to GitHub at once.
+_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="gh-mcp")
+atexit.register(_EXECUTOR.shutdown)
+
+PORT = int(os.getenv("PORT", "8000"))
+
+# MCP_DEBUG=1 adds diagnostic details to tool responses and pretty-prints their JSON
+_DEBUG = os.getenv("MCP_DEBUG") == "1"
+
+
+# -----------------------------
+# Client helpers (use gh / _DEBUG from above)
+# -----------------------------
+def _dumps(obj) -> str:
+    # orjson serializes datetime natively (RFC 3339), so payloads can carry them as-is.
+    # Output is compact: indentation only costs bytes and tokens for the LLM consumer.
+    option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if _DEBUG else 0)
+    return orjson.dumps(obj, option=option).decode()
+
+
+# (url, params) -> (etag, parsed body, body length) of the last 200 response seen for
+# that request. Bounded by total body size rather than entry count, since a single
+# file's inline base64 content can be over a megabyte.
+_etag_cache: LRUCache = LRUCache(maxsize=64 * 1024 * 1024, getsizeof=lambda entry: entry[2])
+_etag_lock = threading.Lock()
+
+
+def _conditional_get(url: str, parameters: Optional[dict] = None):
+    # Revalidate with If-None-Match; a 304 has no body and does not count against the
+    # rate limit, so unchanged resources are served from the stored copy for free.
+    key = (url, tuple(sorted((parameters or {}).items())))
+    with _etag_lock:
+        stored = _etag_cache.get(key)
+    status, headers, output = gh.requester.requestJson(
+        "GET",
+        url,
+        parameters=parameters,
+        headers={"If-None-Match": stored[0]} if stored else None,
+        follow_302_redirect=True,
+    )
+    if status == 304 and stored:
+        return stored[1]
+
+    if status >= 400:
+        # error bodies are not always JSON (e.g. an HTML 502 from GitHub's edge)
+        try:
+            error = orjson.loads(output) if output else None
+        except orjson.JSONDecodeError:
+            error = {"data": output}
+        raise gh.requester.createException(status, headers, error)
+
+    data = orjson.loads(output) if output else None
+    if "etag" in headers and len(output) <= _etag_cache.maxsize:
+        with _etag_lock:
+            _etag_cache[key] = (headers["etag"], data, len(output))
+    return data
+
+
+def _license_id(owner: str, repo: str) -> Optional[str]:
+    # /license 404s on repos without a license
+    try:
+        return _conditional_get(f"/repos/{owner}/{repo}/license")["license"]["spdx_id"]
+    except UnknownObjectException:
+        return None
+
+
+def _topics(owner: str, repo: str) -> list:
+    return _conditional_get(f"/repos/{owner}/{repo}/topics")["names"]
+
+
+def _page_window(paginated, page: int, per_page: int, limit: Optional[int] = None) -> list:
+    # GitHub returns at most 100 items per page, so a caller's (page, per_page) window
+    # can't be requested directly. Map it onto the client's fixed-size API pages and
+    # fetch just the ones that overlap it. Items past `limit` are never requested.
+    if page < 1 or per_page < 1:
+        raise ValueError("page and per_page must be at least 1")
+    size = gh.per_page
+    start = (page - 1) * per_page
+    end = start + per_page if limit is None else min(start + per_page, limit)
+    if end <= start:
+        return []
+
+    items = []
+    for api_page in range(start // size, (end - 1) // size + 1):
+        batch = paginated.get_page(api_page)
+        items.extend(batch)
+        if len(batch) < size:
+            break
+    offset = start % size
+    return items[offset : offset + end - start]
+
+
+def _get_contents(r: Repository, path: str, ref: Optional[str]):
+    # Same as Repository.get_contents(), but through the ETag cache
+    assert isinstance(path, str), path
+    assert isinstance(ref, str), ref
+    data = _conditional_get(
+        f"{r.url}/contents/{urllib.parse.quote(path if path != '/' else '')}",
+        {"ref": ref},
+    )
+    if isinstance(data, list):
+        # as in PyGithub, listed files stay lazily completable; directories are complete
+        return [
+            ContentFile(gh.requester, {}, item, completed=(item["type"] != "file"))
+            for item in data
+        ]
+    return ContentFile(gh.requester, {}, data, completed=True)
 
-PORT = os.getenv("PORT", 8000)
 
 # -----------------------------
 # MCP server (FastMCP)
@@ -70,27 +235,17 @@ def list_repositories(
 
         # Emulate filters similar to Octokit
         if type == "owner":
-            repos_iter = user.get_repos(affiliation="owner")
+            repos_iter = user.get_repos(affiliation="owner", sort=sort, direction=direction)
         elif type == "member":
-            repos_iter = user.get_repos(affiliation="collaborator,organization_member")
-        elif type == "public":
-            repos_iter = (r for r in user.get_repos() if not r.private)
-        elif type == "private":
-            repos_iter = (r for r in user.get_repos() if r.private)
+            repos_iter = user.get_repos(
+                affiliation="collaborator,organization_member", sort=sort, direction=direction
+            )
+        elif type in ("public", "private"):
+            repos_iter = user.get_repos(visibility=type, sort=sort, direction=direction)
         else:  # "all"
-            repos_iter = user.get_repos()
+            repos_iter = user.get_repos(sort=sort, direction=direction)
 
-        sort_key = {
-            "created": lambda r: r.created_at,
-            "updated": lambda r: r.updated_at,
-            "pushed": lambda r: r.pushed_at,
-            "full_name": lambda r: r.full_name.lower(),
-        }[sort]
-        repos = sorted(repos_iter, key=sort_key, reverse=(direction == "desc"))
-
-        start = (page - 1) * per_page
-        end = start + per_page
-        window = repos[start:end]
+        window = _page_window(repos_iter, page, per_page)
 
         payload = [
             {
@@ -102,51 +257,60 @@ def list_repositories(
                 "language": r.language,
                 "stargazers_count": r.stargazers_count,
                 "forks_count": r.forks_count,
-                "updated_at": r.updated_at.isoformat() if r.updated_at else None,
-                "created_at": r.created_at.isoformat() if r.created_at else None,
+                "updated_at": r.updated_at,
+                "created_at": r.created_at,
             }
             for r in window
         ]
 
-        return f"Found {len(payload)} repositories:\n\n" + json.dumps(payload, indent=2)
+        return f"Found {len(payload)} repositories:\n\n{_dumps(payload)}"
 
     except GithubException as e:
         raise RuntimeError(f"Failed to list repositories: {_err_msg(e)}")
+    except ValueError as e:
+        raise RuntimeError(f"Failed to list repositories: {e}")
+
+
+# Repository metadata and file contents change rarely, while an LLM client tends to ask
+# for the same ones repeatedly; serve repeats from short-lived caches. These hold only the
+# JSON-ready payloads of successful lookups, never response text, errors or PyGithub
+# objects (they hold a requester and its auth state).
+@cached(TTLCache(maxsize=512, ttl=120), lock=threading.Lock())
+def _repository_info(owner: str, repo: str) -> dict:
+    # all three lookups are conditional and independent, so run them together
+    license_future = _EXECUTOR.submit(_license_id, owner, repo)
+    topics_future = _EXECUTOR.submit(_topics, owner, repo)
+    r = gh.create_from_raw_data(Repository, _conditional_get(f"/repos/{owner}/{repo}"))
+
+    return {
+        "name": r.name,
+        "full_name": r.full_name,
+        "description": r.description,
+        "private": r.private,
+        "html_url": r.html_url,
+        "clone_url": r.clone_url,
+        "ssh_url": r.ssh_url,
+        "language": r.language,
+        "stargazers_count": r.stargazers_count,
+        "watchers_count": r.subscribers_count,
+        "forks_count": r.forks_count,
+        "open_issues_count": r.open_issues_count,
+        "size": r.size,
+        "default_branch": r.default_branch,
+        "topics": topics_future.result(),
+        "license": license_future.result(),
+        "created_at": r.created_at,
+        "updated_at": r.updated_at,
+        "pushed_at": r.pushed_at,
+    }
 
 
 @mcp.tool()
 def get_repository(owner: str, repo: str) -> str:
     """Get detailed information about a specific repository."""
     try:
-        r = gh.get_repo(f"{owner}/{repo}")
-        # get_license() can 404 on repos without a license; protect it
-        try:
-            lic = r.get_license().license.spdx_id  # type: ignore[attr-defined]
-        except Exception:
-            lic = None
-
-        info = {
-            "name": r.name,
-            "full_name": r.full_name,
-            "description": r.description,
-            "private": r.private,
-            "html_url": r.html_url,
-            "clone_url": r.clone_url,
-            "ssh_url": r.ssh_url,
-            "language": r.language,
-            "stargazers_count": r.stargazers_count,
-            "watchers_count": r.subscribers_count,
-            "forks_count": r.forks_count,
-            "open_issues_count": r.open_issues_count,
-            "size": r.size,
-            "default_branch": r.default_branch,
-            "topics": r.get_topics(),
-            "license": lic,
-            "created_at": r.created_at.isoformat() if r.created_at else None,
-            "updated_at": r.updated_at.isoformat() if r.updated_at else None,
-            "pushed_at": r.pushed_at.isoformat() if r.pushed_at else None,
-        }
-        return "Repository Details:\n\n" + json.dumps(info, indent=2)
+        info = _repository_info(owner, repo)
+        return f"Repository Details:\n\n{_dumps(info)}"
 
     except GithubException as e:
         raise RuntimeError(f"Failed to get repository {owner}/{repo}: {_err_msg(e)}")
@@ -163,10 +327,8 @@ def search_repositories(
     """Search for repositories on GitHub."""
     try:
         results = gh.search_repositories(query=q, sort=sort or "", order=order)
-
-        start = (page - 1) * per_page
-        end = start + per_page
-        items = list(results)[start:end]
+        # GitHub serves only the first 1000 search results and answers 422 past them
+        items = _page_window(results, page, per_page, limit=_SEARCH_RESULT_LIMIT)
 
         repos = [
             {
@@ -178,7 +340,7 @@ def search_repositories(
                 "stargazers_count": r.stargazers_count,
                 "forks_count": r.forks_count,
                 "score": getattr(r, "score", None),
-                "updated_at": r.updated_at.isoformat() if r.updated_at else None,
+                "updated_at": r.updated_at,
             }
             for r in items
         ]
@@ -187,10 +349,71 @@ def search_repositories(
             "approx_total": getattr(results, "totalCount", None),
             "items": repos,
         }
-        return "Search Results:\n\n" + json.dumps(body, indent=2)
+        return f"Search Results:\n\n{_dumps(body)}"
 
     except GithubException as e:
         raise RuntimeError(f"Failed to search repositories: {_err_msg(e)}")
+    except ValueError as e:
+        raise RuntimeError(f"Failed to search repositories: {e}")
+
+
+@cached(TTLCache(maxsize=128, ttl=60), lock=threading.Lock())
+def _repository_contents(owner: str, repo: str, path: str, ref: Optional[str]):
+    # lazy: only the repository's API url is needed, so skip fetching it
+    r = gh.get_repo(f"{owner}/{repo}", lazy=True)
+    contents = _get_contents(r, path or "", ref)
+
+    if isinstance(contents, list):
+        return [
+            {
+                "name": c.name,
+                "path": c.path,
+                "type": c.type,
+                "size": c.size,
+                "download_url": c.download_url,
+                "html_url": c.html_url,
+            }
+            for c in contents
+        ]
+
+    try:
+        raw_bytes = contents.decoded_content or b""
+    except Exception:
+        # e.g. files over 1 MB come back without inline content
+        raw_bytes = None
+
+    # Only the head of the file is needed for the preview; decode just that
+    head = raw_bytes[:_PREVIEW_BYTES] if raw_bytes is not None else None
+
+    # Decide binary vs text on the raw bytes so binaries are never decoded: a NUL
+    # in the first 8 KB settles it, otherwise count the non-printable bytes
+    # (translate() drops the printable ones) in the first 100
+    is_binary = head is not None and (
+        b"\x00" in head[:8192]
+        or len(head[:100].translate(None, _PRINTABLE_BYTES)) > 10
+    )
+
+    if head is None:
+        preview = "[Unable to decode file contents]"
+    elif is_binary:
+        preview = "[Binary file preview omitted]"
+    else:
+        text = head.decode("utf-8", errors="replace")
+        preview = (
+            text
+            if len(text) <= _PREVIEW_CHARS and len(head) == len(raw_bytes)
+            else text[:_PREVIEW_CHARS] + "\n...[truncated]..."
+        )
+
+    return {
+        "name": contents.name,
+        "path": contents.path,
+        "type": contents.type,
+        "size": contents.size,
+        "download_url": contents.download_url,
+        "html_url": contents.html_url,
+        "preview": preview,
+    }
 
 
 @mcp.tool()
@@ -202,95 +425,28 @@ def get_repository_contents(
 ) -> str:
     """Get the contents of a repository directory or a single file (decoded text)."""
     try:
-        r = gh.get_repo(f"{owner}/{repo}")
         try:
-            contents = r.get_contents(path or "", ref=ref)
+            payload = _repository_contents(owner, repo, path, ref)
         except AssertionError as ae:
+            if not _DEBUG:
+                return f"Invalid path or ref for {owner}/{repo}: path: {path!r}, ref: {ref!r}"
             return (
                 f"[DEBUG] AssertionError while getting contents for {owner}/{repo}{('/' + path) if path else ''}: {repr(ae)}\n"
                 f"path: {path!r}, ref: {ref!r}"
             )
 
         debug_info = (
-            f"[DEBUG] contents type: {type(contents)}, repr: {repr(contents)[:500]}"
+            f"[DEBUG] contents type: {type(payload)}, repr: {repr(payload)[:500]}\n"
+            if _DEBUG
+            else ""
         )
 
-        if isinstance(contents, list):
-            listing = [
-                {
-                    "name": c.name,
-                    "path": c.path,
-                    "type": c.type,
-                    "size": c.size,
-                    "download_url": c.download_url,
-                    "html_url": c.html_url,
-                }
-                for c in contents
-            ]
-            return (
-                debug_info
-                + "\n"
-                + f"Directory Contents ({path or 'root'}):\n\n"
-                + json.dumps(listing, indent=2)
-            )
+        if isinstance(payload, list):
+            header = f"Directory Contents ({path or 'root'}):\n\n"
         else:
-            try:
-                if contents.encoding == "base64" and contents.content:
-                    raw_bytes = base64.b64decode(contents.content)
-                    try:
-                        text = raw_bytes.decode("utf-8", errors="replace")
-                    except Exception:
-                        text = None
-                else:
-                    try:
-                        decoded = getattr(contents, "decoded_content", b"")
-                        text = decoded.decode("utf-8", errors="replace")
-                    except Exception:
-                        text = None
-
-                is_binary = False
-                if text is not None:
-                    sample = text[:100]
-                    non_printable = sum(
-                        1 for c in sample if ord(c) < 9 or (13 < ord(c) < 32)
-                    )
-                    if non_printable > 10:
-                        is_binary = True
-
-                if text is None:
-                    preview = "[Unable to decode file contents]"
-                elif is_binary:
-                    preview = "[Binary file preview omitted]"
-                else:
-                    preview = (
-                        text
-                        if len(text) <= 4000
-                        else text[:4000] + "\n...[truncated]..."
-                    )
-
-                file_info = {
-                    "name": contents.name,
-                    "path": contents.path,
-                    "type": contents.type,
-                    "size": contents.size,
-                    "download_url": contents.download_url,
-                    "html_url": contents.html_url,
-                    "preview": preview,
-                }
-                return (
-                    debug_info
-                    + "\n"
-                    + "File Details:\n\n"
-                    + json.dumps(file_info, indent=2)
-                )
-            except Exception as e:
-                return (
-                    debug_info
-                    + "\n"
-                    + (
-                        f"Unexpected error decoding file for {owner}/{repo}{('/' + path) if path else ''}: {type(e).__name__}: {repr(e)}"
-                    )
-                )
+            header = "File Details:\n\n"
+        return "".join([debug_info, header, _dumps(payload)])
+
     except GithubException as e:
         raise RuntimeError(
             f"Failed to get contents for {owner}/{repo}{('/' + path) if path else ''}: {_err_msg(e)}"